@@ -1,15 +1,76 @@
-from flask import Flask, request, jsonify, send_from_directory, make_response
+from flask import Flask, request, jsonify, make_response
 from flask_cors import CORS
 import subprocess
 import os
 import json
+import csv
+import gzip
+import hashlib
+import io
+import shlex
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+
+# Retry settings inherited by the aws subprocesses of /run-aws
+os.environ.setdefault("AWS_RETRY_MODE", "adaptive")
+os.environ.setdefault("AWS_MAX_ATTEMPTS", "5")
 
 app = Flask(__name__)
 CORS(app)
 
+# Long-lived IAM client so every request reuses the same connection pool
+IAM = boto3.client(
+    "iam",
+    config=Config(
+        max_pool_connections=32,
+        tcp_keepalive=True,
+        retries={"mode": "adaptive", "max_attempts": 5}
+    )
+)
+
+# Upper bound on concurrent list_mfa_devices calls, to stay clear of IAM throttling
+MAX_MFA_LOOKUP_WORKERS = 20
+
+# Oldest credential report trusted, going by its GeneratedTime; IAM hands back
+# its existing report rather than a new one for up to 4 hours
+CREDENTIAL_REPORT_TTL = 4 * 60 * 60
+_credential_report = {"rows": None, "generated_at": None}
+
+# Route responses cached in-process as key -> (monotonic timestamp, value)
+USERS_WITHOUT_MFA_TTL = 5 * 60
+_response_cache = {}
+_refreshing = set()
+_refresh_lock = threading.Lock()
+
+def _load_openapi_spec():
+    """Read, minify and pre-compress the OpenAPI spec once at startup"""
+    with open(os.path.join(app.root_path, 'static/.well-known', 'openapi.json'), 'rb') as f:
+        body = json.dumps(json.load(f), separators=(",", ":")).encode("utf-8")
+    return body, gzip.compress(body), hashlib.blake2b(body).hexdigest()[:16]
+
+OPENAPI_BODY, OPENAPI_GZIP_BODY, OPENAPI_ETAG = _load_openapi_spec()
+
 @app.route('/.well-known/openapi.json')
 def serve_openapi():
-    return send_from_directory(os.path.join(app.root_path, 'static/.well-known'), 'openapi.json')
+    if request.if_none_match.contains(OPENAPI_ETAG):
+        return make_response("", 304, {"ETag": f'"{OPENAPI_ETAG}"'})
+
+    headers = {
+        "Content-Type": "application/json",
+        "ETag": f'"{OPENAPI_ETAG}"',
+        "Cache-Control": "public, max-age=3600",
+        "Vary": "Accept-Encoding"
+    }
+    if "gzip" in request.accept_encodings:
+        headers["Content-Encoding"] = "gzip"
+        return make_response(OPENAPI_GZIP_BODY, 200, headers)
+    return make_response(OPENAPI_BODY, 200, headers)
 
 @app.route("/run-aws", methods=["POST"])
 def run_aws():
@@ -17,35 +78,145 @@ def run_aws():
     command = data.get("command")
     print(command)
 
+    # Run the CLI directly from argv; no shell is involved
     try:
-        result = subprocess.check_output(command, shell=True, stderr=subprocess.STDOUT)
-        return jsonify({"text": result.decode("utf-8")})
-    except subprocess.CalledProcessError as e:
-        return jsonify({"text": e.output.decode("utf-8")}), 500
+        cmd_parts = shlex.split(command or "")
+    except ValueError as e:
+        return jsonify({"error": f"Error parsing command: {e}"}), 400
 
-@app.route("/iam/users-without-mfa", methods=["GET"])
-def users_without_mfa():
+    if not cmd_parts or cmd_parts[0] != "aws":
+        return jsonify({"error": "Only commands starting with 'aws ' are allowed"}), 400
+
+    try:
+        result = subprocess.run(cmd_parts, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    except OSError as e:
+        # e.g. the AWS CLI isn't installed or isn't on PATH
+        return jsonify({"error": f"Error running command: {e}"}), 500
+    if result.returncode != 0:
+        return jsonify({"text": result.stdout.decode("utf-8")}), 500
+    return jsonify({"text": result.stdout.decode("utf-8")})
+
+def _credential_report_is_stale():
+    """Whether the cached credential report is missing or older than CREDENTIAL_REPORT_TTL"""
+    if _credential_report["rows"] is None:
+        return True
+    age = datetime.now(timezone.utc) - _credential_report["generated_at"]
+    return age.total_seconds() > CREDENTIAL_REPORT_TTL
+
+def _users_without_mfa_from_report():
+    """Return users without MFA from the IAM credential report, or None if unavailable or stale"""
+    if _credential_report_is_stale():
+        try:
+            for _ in range(10):
+                if IAM.generate_credential_report()["State"] == "COMPLETE":
+                    break
+                time.sleep(1)
+            else:
+                return None
+
+            response = IAM.get_credential_report()
+        except ClientError:
+            return None
+
+        _credential_report["rows"] = list(csv.DictReader(io.StringIO(response["Content"].decode("utf-8"))))
+        _credential_report["generated_at"] = response["GeneratedTime"]
+
+        # The report IAM returned may itself be old; list the users instead
+        if _credential_report_is_stale():
+            return None
+
+    return [
+        row["user"] for row in _credential_report["rows"]
+        if row.get("mfa_active") == "false" and row.get("user") != "<root_account>"
+    ]
+
+def _users_without_mfa_from_devices(max_workers):
+    """Return users without MFA by listing the MFA devices of every IAM user"""
+    # Get list of all IAM users, 1000 per page (the IAM maximum)
+    page_config = {"PageSize": 1000}
+    usernames = list(
+        IAM.get_paginator("list_users")
+        .paginate(PaginationConfig=page_config)
+        .search("Users[].UserName")
+    )
+
+    # One paginated call covers every user with a virtual MFA device;
+    # only the rest need a per-user lookup for hardware or FIDO devices
+    virtual_mfa_users = set(
+        IAM.get_paginator("list_virtual_mfa_devices")
+        .paginate(AssignmentStatus="Assigned", PaginationConfig=page_config)
+        .search("VirtualMFADevices[].User.UserName")
+    )
+    usernames = [username for username in usernames if username not in virtual_mfa_users]
+
+    def list_mfa_devices(username):
+        try:
+            return username, IAM.list_mfa_devices(UserName=username)["MFADevices"]
+        except IAM.exceptions.NoSuchEntityException:
+            # User was deleted after list_users returned; skip it
+            return username, None
+
+    workers = min(max(1, max_workers), MAX_MFA_LOOKUP_WORKERS)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(list_mfa_devices, usernames))
+
+    return [
+        username for username, mfa_devices in results
+        if mfa_devices is not None and len(mfa_devices) == 0
+    ]
+
+def _find_users_without_mfa(max_workers):
+    """Build the users-without-MFA response text"""
+    # Prefer the bulk credential report; fall back to per-user lookups
+    users_without_mfa = _users_without_mfa_from_report()
+    if users_without_mfa is None:
+        users_without_mfa = _users_without_mfa_from_devices(max_workers)
+
+    return "\n".join(users_without_mfa) if users_without_mfa else "All users have MFA enabled."
+
+def _refresh_cached(key, compute):
+    """Recompute a cached response, ignoring failures so the stale entry stays served"""
     try:
-        # Get list of all IAM users
-        users_output = subprocess.check_output("aws iam list-users", shell=True)
-        users = json.loads(users_output.decode("utf-8"))["Users"]
+        _response_cache[key] = (time.monotonic(), compute())
+    except (BotoCoreError, ClientError) as e:
+        app.logger.warning(f"Background refresh of {key} failed: {e}")
+    finally:
+        with _refresh_lock:
+            _refreshing.discard(key)
 
-        users_without_mfa = []
+def _cached_response(key, ttl, compute):
+    """Serve a cached response, refreshing it in the background once it is half expired"""
+    cached = _response_cache.get(key)
+    if cached is not None:
+        age = time.monotonic() - cached[0]
+        if age < ttl:
+            if age > ttl / 2:
+                with _refresh_lock:
+                    start_refresh = key not in _refreshing
+                    _refreshing.add(key)
+                if start_refresh:
+                    threading.Thread(target=_refresh_cached, args=(key, compute), daemon=True).start()
+            return cached[1]
 
-        for user in users:
-            username = user["UserName"]
-            mfa_cmd = f"aws iam list-mfa-devices --user-name {username}"
-            mfa_output = subprocess.check_output(mfa_cmd, shell=True)
-            mfa_devices = json.loads(mfa_output.decode("utf-8"))["MFADevices"]
+    value = compute()
+    _response_cache[key] = (time.monotonic(), value)
+    return value
 
-            if len(mfa_devices) == 0:
-                users_without_mfa.append(username)
+@app.route("/iam/users-without-mfa", methods=["GET"])
+def users_without_mfa():
+    try:
+        max_workers = request.args.get("max_workers", default=16, type=int)
 
-        output_text = "\n".join(users_without_mfa) if users_without_mfa else "All users have MFA enabled."
+        output_text = _cached_response(
+            "users_without_mfa",
+            USERS_WITHOUT_MFA_TTL,
+            lambda: _find_users_without_mfa(max_workers)
+        )
         return jsonify({"text": output_text})
     
-    except subprocess.CalledProcessError as e:
-        return jsonify({"text": e.output.decode("utf-8")}), 500
+    except (BotoCoreError, ClientError) as e:
+        return jsonify({"text": str(e)}), 500
 
 if __name__ == "__main__":
-    app.run(debug=True, host='0.0.0.0', port=5001)
+    # Development server only; deploy with gunicorn (see gunicorn.conf.py)
+    app.run(debug=False, threaded=True, host='0.0.0.0', port=5001)
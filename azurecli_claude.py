@@ -7,10 +7,16 @@ A Model Context Protocol server that executes Azure CLI commands safely.
 import asyncio
 import json
 import logging
+import math
+import os
+import re
 import subprocess
 import sys
-from typing import Any, Dict, List, Optional
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 import shlex
+import signal
 
 # MCP server imports
 try:
@@ -29,95 +35,217 @@ except ImportError:
     print("Error: MCP library not installed. Install with: pip install mcp")
     sys.exit(1)
 
+# orjson is optional; it parses CLI JSON output straight from bytes, faster
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("azure-mcp-server")
 
+# Seconds a CLI status check result is served from memory
+STATUS_CACHE_TTL = 60
+
+# Output limits for CLI subprocesses
+MAX_OUTPUT_BYTES = 1024 * 1024
+HELP_READ_BYTES = 2048
+HELP_TEXT_LIMIT = 2000  # characters
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Seconds between sweeps for CLI processes that outlived their timeout
+REAPER_INTERVAL = 30
+
+# Most CLI subprocesses allowed to run at once
+MAX_CONCURRENT_COMMANDS = 8
+
+# Timeout for a command when the caller does not give one, in seconds
+DEFAULT_COMMAND_TIMEOUT = 30
+
+def _parse_timeout(value: Any, default: float = DEFAULT_COMMAND_TIMEOUT) -> float:
+    """Validate a tool's timeout argument as a positive number of seconds (raises ValueError)"""
+    if value is None:
+        return default
+    try:
+        if isinstance(value, bool):
+            raise TypeError
+        timeout = float(value)
+    except (TypeError, ValueError):
+        raise ValueError("timeout must be a positive number of seconds") from None
+    if not math.isfinite(timeout) or timeout <= 0:
+        raise ValueError("timeout must be a positive number of seconds")
+    return timeout
+
+def _signal_process_group(process: asyncio.subprocess.Process, terminate: bool = False) -> None:
+    """Kill (or terminate) a CLI process and everything it started
+
+    CLI processes run in their own session, so the process group also covers
+    children of launcher scripts that would otherwise keep our pipes open.
+    """
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGTERM if terminate else signal.SIGKILL)
+        elif terminate:
+            process.terminate()
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+
+class CommandResult(NamedTuple):
+    returncode: Optional[int]
+    stdout: bytes
+    stderr: bytes
+    truncated: bool
+
+async def _read_stream(
+    stream: asyncio.StreamReader, limit: int, stop_at_limit: bool = False
+) -> Tuple[bytes, bool]:
+    """Read a pipe in chunks, keeping at most `limit` bytes and discarding the rest"""
+    buffer = bytearray()
+    truncated = False
+    
+    while True:
+        chunk = await stream.read(STREAM_CHUNK_SIZE)
+        if not chunk:
+            break
+        
+        room = limit - len(buffer)
+        if len(chunk) >= room:
+            buffer += chunk[:room]
+            truncated = len(chunk) > room or stop_at_limit
+            if stop_at_limit:
+                break
+        else:
+            buffer += chunk
+    
+    return bytes(buffer), truncated
+
+# Potentially dangerous operations, built once and matched together by one regex
+DANGEROUS_PATTERNS = frozenset({
+    "delete", "remove", "destroy", "purge",
+    "&&", "||", ";", "|", ">", "<",
+    "sudo", "su", "chmod", "chown",
+    "eval", "exec", "system", "rm ",
+    # Azure-specific dangerous operations
+    "deployment delete", "group delete",
+    "vm delete", "disk delete",
+    "keyvault delete", "storage delete"
+})
+_DANGEROUS_RE = re.compile("|".join(re.escape(p) for p in sorted(DANGEROUS_PATTERNS)))
+
 class AzureMCPServer:
     def __init__(self):
         self.server = Server("azure-cli-server")
+        # The CLI version cannot change while we run, so it is looked up once
+        self._azure_version_task: Optional[asyncio.Task] = None
+        self._azure_status_cache: Optional[Tuple[float, List[TextContent]]] = None
+        self._azure_status_refresh: Optional[asyncio.Task] = None
+        self._processes: Dict[asyncio.subprocess.Process, float] = {}
+        self._cli_slots = asyncio.Semaphore(MAX_CONCURRENT_COMMANDS)
         self.setup_handlers()
         
     def setup_handlers(self):
         """Set up MCP server handlers"""
         
-        @self.server.list_tools()
-        async def handle_list_tools() -> List[Tool]:
-            """List available tools"""
-            return [
-                Tool(
-                    name="cloud-sec-azure-cli",
-                    description="Execute Azure CLI commands safely",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "command": {
-                                "type": "string",
-                                "description": "The Azure CLI command to execute (without 'az' prefix)"
-                            },
-                            "timeout": {
-                                "type": "integer",
-                                "description": "Command timeout in seconds (default: 30)",
-                                "default": 30
-                            }
+        # The tool schemas never change, so build them once
+        self._tools = [
+            Tool(
+                name="cloud-sec-azure-cli",
+                description="Execute Azure CLI commands safely",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "command": {
+                            "type": ["string", "array"],
+                            "items": {"type": "string"},
+                            "description": "The Azure CLI command to execute (without 'az' prefix), as a string or a list of arguments"
                         },
-                        "required": ["command"]
-                    }
-                ),
-                Tool(
-                    name="cloud-sec-azure-login-check",
-                    description="Check Azure CLI login status and configuration",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {}
-                    }
-                ),
-                Tool(
-                    name="cloud-sec-azure-help",
-                    description="Get help for Azure CLI commands",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "service": {
-                                "type": "string",
-                                "description": "Azure service/command name (optional)"
-                            }
+                        "timeout": {
+                            "type": "integer",
+                            "description": "Command timeout in seconds (default: 30)",
+                            "default": 30
+                        }
+                    },
+                    "required": ["command"]
+                }
+            ),
+            Tool(
+                name="cloud-sec-azure-login-check",
+                description="Check Azure CLI login status and configuration",
+                inputSchema={
+                    "type": "object",
+                    "properties": {}
+                }
+            ),
+            Tool(
+                name="cloud-sec-azure-help",
+                description="Get help for Azure CLI commands",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "service": {
+                            "type": "string",
+                            "description": "Azure service/command name (optional)"
                         }
                     }
-                ),
-                Tool(
-                    name="cloud-sec-azure-account-info",
-                    description="Get current Azure account and subscription information",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {}
-                    }
-                )
-            ]
+                }
+            ),
+            Tool(
+                name="cloud-sec-azure-account-info",
+                description="Get current Azure account and subscription information",
+                inputSchema={
+                    "type": "object",
+                    "properties": {}
+                }
+            )
+        ]
+        
+        @self.server.list_tools()
+        async def handle_list_tools() -> List[Tool]:
+            """List available tools"""
+            return self._tools
+
+        self._dispatch = {
+            "cloud-sec-azure-cli": self._execute_azure_command,
+            "cloud-sec-azure-login-check": lambda arguments: self._check_azure_login(),
+            "cloud-sec-azure-help": self._get_azure_help,
+            "cloud-sec-azure-account-info": lambda arguments: self._get_account_info(),
+        }
 
         @self.server.call_tool()
         async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
             """Handle tool calls"""
-            
-            if name == "cloud-sec-azure-cli":
-                return await self._execute_azure_command(arguments)
-            elif name == "cloud-sec-azure-login-check":
-                return await self._check_azure_login()
-            elif name == "cloud-sec-azure-help":
-                return await self._get_azure_help(arguments)
-            elif name == "cloud-sec-azure-account-info":
-                return await self._get_account_info()
-            else:
+            handler = self._dispatch.get(name)
+            if handler is None:
                 return [TextContent(
                     type="text",
                     text=f"Unknown tool: {name}"
                 )]
+            return await handler(arguments)
 
     async def _execute_azure_command(self, arguments: Dict[str, Any]) -> List[TextContent]:
         """Execute Azure CLI command safely"""
         try:
-            command = arguments.get("command", "").strip()
-            timeout = arguments.get("timeout", 30)
+            command = arguments.get("command", "")
+            
+            # Validate before anything is spawned
+            try:
+                timeout = _parse_timeout(arguments.get("timeout"))
+            except ValueError as e:
+                return [TextContent(
+                    type="text",
+                    text=f"Error: {e}"
+                )]
+            
+            # Commands may arrive pre-tokenized, which skips shlex entirely
+            args: Optional[List[str]] = None
+            if isinstance(command, list):
+                args = [str(arg) for arg in command]
+                command = shlex.join(args)
+            command = command.strip()
             
             if not command:
                 return [TextContent(
@@ -135,50 +263,43 @@ class AzureMCPServer:
             # Prepare full Azure command
             full_command = f"az {command}"
             
-            # Parse command safely
-            try:
-                cmd_parts = shlex.split(full_command)
-            except ValueError as e:
-                return [TextContent(
-                    type="text",
-                    text=f"Error parsing command: {str(e)}"
-                )]
+            # Parse only the user-supplied part; the binary is already a token
+            if args is None:
+                try:
+                    args = self._split_command(command)
+                except ValueError as e:
+                    return [TextContent(
+                        type="text",
+                        text=f"Error parsing command: {str(e)}"
+                    )]
+            cmd_parts = ["az", *args]
             
             # Execute command
             logger.info(f"Executing: {full_command}")
             
-            # Create subprocess
-            process = await asyncio.create_subprocess_exec(
-                *cmd_parts,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            # Use asyncio.wait_for to handle timeout
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(), 
-                timeout=timeout
-            )
+            # Run command, streaming its output with a size cap
+            result = await self._run_cli(cmd_parts, timeout=timeout)
             
             # Prepare response
-            response_text = f"Command: {full_command}\n"
-            response_text += f"Exit Code: {process.returncode}\n\n"
+            parts = [f"Command: {full_command}\nExit Code: {result.returncode}\n\n"]
             
-            if stdout:
-                response_text += f"Output:\n{stdout.decode('utf-8')}\n"
+            if result.stdout:
+                parts.append(f"Output:\n{result.stdout.decode('utf-8', errors='replace')}\n")
+                if result.truncated:
+                    parts.append("... (output truncated)\n")
             
-            if stderr:
-                response_text += f"Error:\n{stderr.decode('utf-8')}\n"
+            if result.stderr:
+                parts.append(f"Error:\n{result.stderr.decode('utf-8', errors='replace')}\n")
             
             return [TextContent(
                 type="text",
-                text=response_text
+                text="".join(parts)
             )]
             
         except asyncio.TimeoutError:
             return [TextContent(
                 type="text",
-                text=f"Error: Command timed out after {timeout} seconds"
+                text=f"Error: Command timed out after {timeout:g} seconds"
             )]
         except Exception as e:
             return [TextContent(
@@ -188,54 +309,68 @@ class AzureMCPServer:
 
     async def _check_azure_login(self) -> List[TextContent]:
         """Check Azure CLI login status"""
+        cached = self._azure_status_cache
+        if cached is not None:
+            age = time.monotonic() - cached[0]
+            if age < STATUS_CACHE_TTL:
+                # Refresh in the background once the entry is half expired
+                if age > STATUS_CACHE_TTL / 2 and (
+                    self._azure_status_refresh is None or self._azure_status_refresh.done()
+                ):
+                    self._azure_status_refresh = asyncio.create_task(self._load_azure_login())
+                return cached[1]
+        
+        return await self._load_azure_login()
+
+    async def _fetch_azure_version(self) -> Optional[str]:
+        """Get the Azure CLI version, or None if the CLI is not usable"""
         try:
-            # Check if Azure CLI is installed
-            process = await asyncio.create_subprocess_exec(
-                "az", "--version",
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(), 
-                timeout=10
-            )
+            result = await self._run_cli(["az", "--version"], timeout=10)
+        except FileNotFoundError:
+            return None
+        if result.returncode != 0:
+            return None
+        return result.stdout.decode('utf-8', errors='replace').strip()
+
+    async def _load_azure_login(self) -> List[TextContent]:
+        """Run the Azure CLI status checks and cache a successful result"""
+        try:
+            # Check if Azure CLI is installed, reusing the lookup started by run()
+            if self._azure_version_task is None:
+                self._azure_version_task = asyncio.create_task(self._fetch_azure_version())
+            try:
+                version_info = await asyncio.shield(self._azure_version_task)
+            except Exception:
+                self._azure_version_task = None
+                raise
             
-            if process.returncode != 0:
+            if version_info is None:
+                self._azure_version_task = None
                 return [TextContent(
                     type="text",
                     text="Azure CLI is not installed or not accessible"
                 )]
             
-            version_info = stdout.decode('utf-8').strip()
-            
             # Check login status
-            login_process = await asyncio.create_subprocess_exec(
-                "az", "account", "show",
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            login_stdout, login_stderr = await asyncio.wait_for(
-                login_process.communicate(),
-                timeout=10
-            )
+            login_result = await self._run_cli(["az", "account", "show"], timeout=10)
             
             response_text = f"Azure CLI Version:\n{version_info}\n\n"
             
-            if login_process.returncode == 0:
+            if login_result.returncode == 0:
                 response_text += "Login Status: Logged in\n"
                 response_text += "Current Account:\n"
-                response_text += login_stdout.decode('utf-8')
+                response_text += login_result.stdout.decode('utf-8', errors='replace')
             else:
                 response_text += "Login Status: Not logged in\n"
                 response_text += "Error:\n"
-                response_text += login_stderr.decode('utf-8')
+                response_text += login_result.stderr.decode('utf-8', errors='replace')
             
-            return [TextContent(
+            response = [TextContent(
                 type="text",
                 text=response_text
             )]
+            self._azure_status_cache = (time.monotonic(), response)
+            return response
             
         except asyncio.TimeoutError:
             return [TextContent(
@@ -258,22 +393,16 @@ class AzureMCPServer:
             else:
                 cmd = ["az", "--help"]
             
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(),
-                timeout=10
+            # Help text can be very long, so stop reading once we have enough
+            result = await self._run_cli(
+                cmd, timeout=10, limit=HELP_READ_BYTES, stop_at_limit=True
             )
             
-            if process.returncode == 0:
-                # Truncate help text as it can be very long
-                help_text = stdout.decode('utf-8')
-                if len(help_text) > 2000:
-                    help_text = help_text[:2000] + "\n... (truncated)"
+            if result.returncode == 0 or result.truncated:
+                # Decode only the bytes we keep; a character cut at the end is dropped
+                help_text = result.stdout.decode('utf-8', errors='ignore')
+                if result.truncated or len(help_text) > HELP_TEXT_LIMIT:
+                    help_text = help_text[:HELP_TEXT_LIMIT] + "\n... (truncated)"
                 
                 return [TextContent(
                     type="text",
@@ -282,7 +411,7 @@ class AzureMCPServer:
             else:
                 return [TextContent(
                     type="text",
-                    text=f"Error getting help: {stderr.decode('utf-8')}"
+                    text=f"Error getting help: {result.stderr.decode('utf-8', errors='replace')}"
                 )]
                 
         except asyncio.TimeoutError:
@@ -300,29 +429,28 @@ class AzureMCPServer:
         """Get Azure account and subscription information"""
         try:
             # Get account list
-            process = await asyncio.create_subprocess_exec(
-                "az", "account", "list", "--output", "json",
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(),
+            # Project only the fields we report so there is less JSON to parse
+            result = await self._run_cli(
+                [
+                    "az", "account", "list", "--output", "json",
+                    "--query", "[].{name:name, id:id, state:state, isDefault:isDefault, tenantId:tenantId}"
+                ],
                 timeout=15
             )
             
-            if process.returncode == 0:
+            if result.returncode == 0:
                 try:
-                    accounts = json.loads(stdout.decode('utf-8'))
-                    response_text = "Azure Account Information:\n\n"
-                    
-                    for account in accounts:
-                        response_text += f"Subscription: {account.get('name', 'Unknown')}\n"
-                        response_text += f"ID: {account.get('id', 'Unknown')}\n"
-                        response_text += f"State: {account.get('state', 'Unknown')}\n"
-                        response_text += f"Default: {'Yes' if account.get('isDefault', False) else 'No'}\n"
-                        response_text += f"Tenant ID: {account.get('tenantId', 'Unknown')}\n"
-                        response_text += "-" * 50 + "\n"
+                    accounts = json_loads(result.stdout)
+                    separator = "-" * 50
+                    response_text = "Azure Account Information:\n\n" + "".join(
+                        f"Subscription: {account.get('name', 'Unknown')}\n"
+                        f"ID: {account.get('id', 'Unknown')}\n"
+                        f"State: {account.get('state', 'Unknown')}\n"
+                        f"Default: {'Yes' if account.get('isDefault', False) else 'No'}\n"
+                        f"Tenant ID: {account.get('tenantId', 'Unknown')}\n"
+                        f"{separator}\n"
+                        for account in accounts
+                    )
                     
                     return [TextContent(
                         type="text",
@@ -331,12 +459,12 @@ class AzureMCPServer:
                 except json.JSONDecodeError:
                     return [TextContent(
                         type="text",
-                        text=f"Raw output:\n{stdout.decode('utf-8')}"
+                        text=f"Raw output:\n{result.stdout.decode('utf-8', errors='replace')}"
                     )]
             else:
                 return [TextContent(
                     type="text",
-                    text=f"Error getting account info: {stderr.decode('utf-8')}"
+                    text=f"Error getting account info: {result.stderr.decode('utf-8', errors='replace')}"
                 )]
                 
         except asyncio.TimeoutError:
@@ -352,53 +480,121 @@ class AzureMCPServer:
 
     def _is_safe_command(self, command: str) -> bool:
         """Check if command is safe to execute"""
-        # List of potentially dangerous operations
-        dangerous_patterns = [
-            "delete", "remove", "destroy", "purge",
-            "&&", "||", ";", "|", ">", "<",
-            "sudo", "su", "chmod", "chown",
-            "eval", "exec", "system", "rm ",
-            # Azure-specific dangerous operations
-            "deployment delete", "group delete",
-            "vm delete", "disk delete",
-            "keyvault delete", "storage delete"
-        ]
+        reason = self._unsafe_reason(command)
+        if reason:
+            logger.warning(f"{reason}: {command}")
+            return False
         
+        return True
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _unsafe_reason(command: str) -> Optional[str]:
+        """Return why a command is blocked, or None if it is safe (cached per command)"""
         command_lower = command.lower()
         
-        # Check for dangerous patterns
-        for pattern in dangerous_patterns:
-            if pattern in command_lower:
-                logger.warning(f"Blocked potentially dangerous command: {command}")
-                return False
+        # Check for dangerous patterns in a single pass
+        if _DANGEROUS_RE.search(command_lower):
+            return "Blocked potentially dangerous command"
         
         # Additional safety checks
         if command.startswith("-") or command.startswith("--"):
-            logger.warning(f"Blocked command starting with dash: {command}")
-            return False
+            return "Blocked command starting with dash"
         
         # Check for delete operations in various forms
         if " delete " in command_lower or command_lower.endswith(" delete"):
-            logger.warning(f"Blocked delete operation: {command}")
-            return False
+            return "Blocked delete operation"
         
-        return True
+        return None
+
+    async def _run_cli(
+        self,
+        cmd_parts,
+        timeout: float,
+        limit: int = MAX_OUTPUT_BYTES,
+        stop_at_limit: bool = False
+    ) -> CommandResult:
+        """Run a CLI command, streaming its output into bounded buffers"""
+        # Bound concurrent CLI processes; callers over the limit wait their turn
+        async with self._cli_slots:
+            process = await asyncio.create_subprocess_exec(
+                *cmd_parts,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=True
+            )
+        
+            async def read_stdout() -> Tuple[bytes, bool]:
+                stdout, truncated = await _read_stream(process.stdout, limit, stop_at_limit)
+                if truncated and stop_at_limit:
+                    # We have all we need; don't wait for the rest of the output
+                    _signal_process_group(process, terminate=True)
+                return stdout, truncated
+        
+            async def collect() -> Tuple[Tuple[bytes, bool], Tuple[bytes, bool]]:
+                outputs = await asyncio.gather(
+                    read_stdout(),
+                    _read_stream(process.stderr, limit)
+                )
+                await process.wait()
+                return outputs
+        
+            completed = False
+            try:
+                # Let the reaper kill the process if it outlives twice its timeout
+                self._processes[process] = time.monotonic() + 2 * timeout
+                # asyncio.wait_for rather than asyncio.timeout, which needs Python 3.11
+                (stdout, truncated), (stderr, _) = await asyncio.wait_for(collect(), timeout)
+                completed = True
+                return CommandResult(process.returncode, stdout, stderr, truncated)
+            finally:
+                # Never leave the child, or anything it started, running after a
+                # timeout or cancellation; leftovers would hold the pipes open
+                if not completed:
+                    _signal_process_group(process)
+                    await process.wait()
+                self._processes.pop(process, None)
+
+    async def _reap_processes(self):
+        """Periodically kill CLI processes that outlived twice their timeout"""
+        while True:
+            await asyncio.sleep(REAPER_INTERVAL)
+            now = time.monotonic()
+            for process, deadline in list(self._processes.items()):
+                if process.returncode is None and now > deadline:
+                    logger.warning(f"Killing stuck CLI process group {process.pid}")
+                    _signal_process_group(process)
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _split_command(command: str) -> Tuple[str, ...]:
+        """Split a command line into arguments (cached per command)"""
+        return tuple(shlex.split(command))
 
     async def run(self):
         """Run the MCP server"""
         logger.info("Starting Azure CLI MCP Server")
         
-        # Initialize and run server
-        async with stdio_server() as streams:
-            await self.server.run(
-                streams[0], 
-                streams[1], 
-                InitializationOptions(
-                    server_name="azure-cli-server",
-                    server_version="1.0.0",
-                    capabilities={}
+        # Look up the CLI version in the background so the first check is fast
+        self._azure_version_task = asyncio.create_task(self._fetch_azure_version())
+        
+        # Sweep for CLI processes that outlive their timeout
+        reaper = asyncio.create_task(self._reap_processes())
+        
+        try:
+            # Initialize and run server
+            async with stdio_server() as streams:
+                await self.server.run(
+                    streams[0], 
+                    streams[1], 
+                    InitializationOptions(
+                        server_name="azure-cli-server",
+                        server_version="1.0.0",
+                        capabilities={}
+                    )
                 )
-            )
+        finally:
+            reaper.cancel()
 
 def main():
     """Main entry point"""
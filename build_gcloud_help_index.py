@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Build the gcloud help index
+Renders `gcloud [service [command]] --help` ahead of time and writes it to
+gcloud_help_index.json, which the GCP CLI MCP server serves without
+starting gcloud. Re-run it whenever the installed gcloud is upgraded.
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from gcpcli_claude import HELP_INDEX_PATH, _help_key, _truncate_help
+
+# Section headings listing the subgroups and subcommands of a help page
+LISTING_SECTIONS = ("GROUPS", "COMMANDS")
+
+# Entries in those sections are bare names on their own, slightly indented line
+ENTRY_RE = re.compile(r"^ {4,6}([a-z][a-z0-9-]*)$")
+
+def render_help(*args: str) -> Optional[str]:
+    """Render one help page, or None if gcloud does not know it"""
+    result = subprocess.run(
+        ["gcloud", *args, "--help"],
+        capture_output=True,
+        text=True,
+        timeout=60
+    )
+    if result.returncode != 0:
+        print(f"Skipping gcloud {' '.join(args)}: {result.stderr.strip()}", file=sys.stderr)
+        return None
+    return result.stdout
+
+def list_children(help_text: str) -> List[str]:
+    """Names of the groups and commands listed on a help page"""
+    children = []
+    section = None
+
+    for line in help_text.splitlines():
+        if line and not line[0].isspace():
+            section = line.strip()
+            continue
+        if section in LISTING_SECTIONS:
+            match = ENTRY_RE.match(line)
+            if match:
+                children.append(match.group(1))
+
+    return children
+
+def gcloud_version() -> str:
+    """First line of `gcloud version`, recorded so a stale index can be spotted"""
+    result = subprocess.run(["gcloud", "version"], capture_output=True, text=True, timeout=60)
+    return result.stdout.splitlines()[0] if result.stdout else "unknown"
+
+def build_index(services: List[str], jobs: int) -> Dict[str, str]:
+    """Render the top-level page, each service page and each command page below it"""
+    top_level = render_help()
+    if top_level is None:
+        raise RuntimeError("gcloud --help failed; is the Google Cloud SDK installed?")
+
+    pages = {_help_key("", ""): top_level}
+    services = services or list_children(top_level)
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        service_pages = dict(zip(services, pool.map(render_help, services)))
+        pages.update(
+            (_help_key(service, ""), text) for service, text in service_pages.items() if text is not None
+        )
+
+        commands = [
+            (service, command)
+            for service, text in service_pages.items() if text is not None
+            for command in list_children(text)
+        ]
+        command_pages = pool.map(lambda pair: render_help(*pair), commands)
+        pages.update(
+            (_help_key(service, command), text)
+            for (service, command), text in zip(commands, command_pages) if text is not None
+        )
+
+    return {key: _truncate_help(text) for key, text in pages.items()}
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Pre-render gcloud help for the GCP CLI MCP server")
+    parser.add_argument(
+        "services",
+        nargs="*",
+        help="Services to index, e.g. compute iam storage (default: every top-level group)"
+    )
+    parser.add_argument("--jobs", type=int, default=8, help="Concurrent gcloud processes (default: 8)")
+    parser.add_argument("--output", default=str(HELP_INDEX_PATH), help="Where to write the index")
+    args = parser.parse_args()
+
+    index = {
+        "gcloud_version": gcloud_version(),
+        "help": build_index(args.services, args.jobs)
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, sort_keys=True)
+
+    print(f"Wrote {len(index['help'])} help pages to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -4,226 +4,562 @@ GCP CLI MCP Server
 A Model Context Protocol server that executes Google Cloud CLI commands safely.
 """
 
+from __future__ import annotations
+
 import asyncio
+import base64
+import concurrent.futures
+import configparser
+import gzip
 import json
 import logging
+import math
+import multiprocessing
+import os
+import re
+import selectors
+import signal
 import subprocess
 import sys
-from typing import Any, Dict, List, Optional
+import time
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 import shlex
 
-# MCP server imports
-try:
+# MCP server imports, bound by _import_mcp() on first use so importing this
+# module (e.g. from the help index build script or a pool worker) stays cheap
+Server = InitializationOptions = stdio_server = None
+Tool = TextContent = EmbeddedResource = BlobResourceContents = None
+
+def _import_mcp() -> None:
+    """Import the MCP library into this module's namespace (raises ImportError)"""
+    global Server, InitializationOptions, stdio_server
+    global Tool, TextContent, EmbeddedResource, BlobResourceContents
     from mcp.server import Server
     from mcp.server.models import InitializationOptions
     from mcp.server.stdio import stdio_server
     from mcp.types import (
-        Resource,
         Tool,
         TextContent,
-        ImageContent,
         EmbeddedResource,
-        LoggingLevel
+        BlobResourceContents
     )
+
+# google-auth is optional; without it the auth check shells out to gcloud
+try:
+    import google.auth as google_auth
+    import google.auth.exceptions
+    import google.auth.transport.requests
+except ImportError:
+    google_auth = None
+
+# orjson is optional; it parses the bundled help index faster
+try:
+    import orjson
+    json_loads = orjson.loads
 except ImportError:
-    print("Error: MCP library not installed. Install with: pip install mcp")
-    sys.exit(1)
+    json_loads = json.loads
+
+# uvloop is optional and not available on Windows; without it the default loop is used
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# Cloud SDK settings inherited by every gcloud, gsutil and bq process; user settings
+# take precedence. They skip the update check and the usage report upload that each
+# invocation would otherwise do, and make sure no process ever blocks on a prompt.
+os.environ.setdefault("CLOUDSDK_COMPONENT_MANAGER_DISABLE_UPDATE_CHECK", "true")
+os.environ.setdefault("CLOUDSDK_CORE_DISABLE_USAGE_REPORTING", "true")
+os.environ.setdefault("CLOUDSDK_CORE_DISABLE_PROMPTS", "1")
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("gcp-mcp-server")
 
+# Seconds a CLI status check result is served from memory
+STATUS_CACHE_TTL = 60
+
+# Worker processes that run CLI commands off the event loop, and so the number of
+# commands that can run at once (as MAX_CONCURRENT_COMMANDS in the AWS and Azure servers)
+SUBPROCESS_WORKERS = 8
+
+# Timeout for a command when the caller does not give one, in seconds
+DEFAULT_COMMAND_TIMEOUT = 30
+
+def _parse_timeout(value: Any, default: float = DEFAULT_COMMAND_TIMEOUT) -> float:
+    """Validate a tool's timeout argument as a positive number of seconds (raises ValueError)"""
+    if value is None:
+        return default
+    try:
+        if isinstance(value, bool):
+            raise TypeError
+        timeout = float(value)
+    except (TypeError, ValueError):
+        raise ValueError("timeout must be a positive number of seconds") from None
+    if not math.isfinite(timeout) or timeout <= 0:
+        raise ValueError("timeout must be a positive number of seconds")
+    return timeout
+
+# Output kept per stream; anything beyond is read and discarded
+MAX_OUTPUT_BYTES = 4 * 1024 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Responses larger than this many bytes are sent gzip-compressed (0 disables).
+# Off by default: the full output then reaches the client only as a binary resource.
+def _compress_threshold() -> int:
+    """Read GCP_MCP_COMPRESS_THRESHOLD, disabling compression if it is not a byte count"""
+    value = os.environ.get("GCP_MCP_COMPRESS_THRESHOLD") or "0"
+    try:
+        threshold = int(value)
+    except ValueError:
+        threshold = -1
+    if threshold < 0:
+        logger.warning(f"Ignoring GCP_MCP_COMPRESS_THRESHOLD={value!r}: expected a number of bytes; compression disabled")
+        return 0
+    return threshold
+
+COMPRESS_THRESHOLD = _compress_threshold()
+
+# Bytes at the start of a compressed response that are still sent as plain text
+COMPRESSED_PREVIEW_BYTES = 4096
+
+def _read_pipes(
+    process: subprocess.Popen, limit: int, deadline: float
+) -> Tuple[bytes, bytes, bool]:
+    """Drain stdout and stderr together in chunks until EOF or the deadline
+
+    At most `limit` bytes per stream are kept and the rest is discarded.
+    Raises subprocess.TimeoutExpired once the deadline passes.
+    """
+    buffers = {process.stdout.fileno(): bytearray(), process.stderr.fileno(): bytearray()}
+    truncated = False
+    
+    with selectors.DefaultSelector() as selector:
+        for fd in buffers:
+            selector.register(fd, selectors.EVENT_READ)
+        
+        while selector.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise subprocess.TimeoutExpired(process.args, 0)
+            
+            for key, _ in selector.select(remaining):
+                chunk = os.read(key.fd, STREAM_CHUNK_SIZE)
+                if not chunk:
+                    selector.unregister(key.fd)
+                    continue
+                
+                buffer = buffers[key.fd]
+                room = limit - len(buffer)
+                if len(chunk) > room:
+                    buffer += chunk[:room]
+                    truncated = True
+                else:
+                    buffer += chunk
+    
+    return bytes(buffers[process.stdout.fileno()]), bytes(buffers[process.stderr.fileno()]), truncated
+
+def _kill_process_group(process: subprocess.Popen) -> None:
+    """Kill a CLI process and everything it started, which share its session"""
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+
+def _run_blocking_subprocess(
+    cmd_parts: List[str], timeout: float, limit: int = MAX_OUTPUT_BYTES
+) -> Tuple[int, bytes, bytes, bool]:
+    """Run a command to completion in a pool worker (raises subprocess.TimeoutExpired)"""
+    deadline = time.monotonic() + timeout
+    
+    # Each command gets its own session so a timeout can kill everything it
+    # started; grandchildren of launcher scripts would otherwise hold the pipes.
+    # This rules out subprocess's posix_spawn path, so the child is forked.
+    with subprocess.Popen(
+        cmd_parts,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True
+    ) as process:
+        try:
+            if sys.platform == "win32":
+                # Pipes can't be polled on Windows; cap the output afterwards
+                stdout, stderr = process.communicate(timeout=timeout)
+                truncated = len(stdout) > limit or len(stderr) > limit
+                stdout, stderr = stdout[:limit], stderr[:limit]
+            else:
+                stdout, stderr, truncated = _read_pipes(process, limit, deadline)
+                process.wait(timeout=max(deadline - time.monotonic(), 0))
+        except subprocess.TimeoutExpired:
+            # Don't wait for the pipes to drain; Popen's exit just closes them
+            _kill_process_group(process)
+            raise subprocess.TimeoutExpired(cmd_parts, timeout) from None
+    
+    return process.returncode, stdout, stderr, truncated
+
+# Verbs of commands that only read state; only these are coalesced when identical
+READ_ONLY_VERBS = frozenset({"list", "describe", "get", "ls", "show", "cat", "du", "head", "info", "version"})
+
+# Verbs that change state. A gcloud command is judged by the first verb from either set,
+# so a resource named after a read-only verb further along can't make it look read-only
+MUTATING_VERBS = frozenset({
+    "abandon", "ack", "acknowledge", "activate", "add", "apply", "attach", "call", "cancel",
+    "clone", "copy", "cp", "create", "delete", "deploy", "detach", "disable", "enable",
+    "execute", "export", "failover", "import", "insert", "invoke", "load", "login", "logout",
+    "migrate", "mk", "mb", "modify", "move", "mv", "patch", "promote", "publish", "pull",
+    "query", "rb", "recreate", "remove", "replace", "reset", "resize", "restart", "restore",
+    "resume", "revoke", "rm", "rollback", "rotate", "rsync", "run", "scp", "seek", "set",
+    "sign", "ssh", "start", "stop", "submit", "suspend", "undelete", "update", "upload", "write",
+})
+
+def _is_read_only(cmd_parts: List[str]) -> bool:
+    """Whether a command only reads state, judged by its verb"""
+    # The verb is among the words before the first flag; flag values are never verbs
+    words = []
+    for arg in cmd_parts[1:]:
+        if arg.startswith("-"):
+            break
+        words.append(arg)
+    
+    # gsutil and bq take the verb first; gcloud puts it after the command groups
+    if cmd_parts[0] != "gcloud":
+        words = words[:1]
+    
+    for word in words:
+        # Compound verbs such as get-iam-policy or add-iam-policy-binding go by their first part
+        verb = word.split("-", 1)[0]
+        if verb in READ_ONLY_VERBS:
+            return True
+        if verb in MUTATING_VERBS:
+            return False
+    return False
+
+def _create_subprocess_pool() -> concurrent.futures.ProcessPoolExecutor:
+    """Create the worker pool, forking from a small forkserver where supported"""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        mp_context = multiprocessing.get_context("forkserver")
+    else:
+        mp_context = None
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=SUBPROCESS_WORKERS,
+        mp_context=mp_context
+    )
+
+# Help text is cut to this many characters before it is returned
+HELP_TEXT_LIMIT = 3000
+
+# Pre-rendered help, written by build_gcloud_help_index.py
+HELP_INDEX_PATH = Path(__file__).with_name("gcloud_help_index.json")
+
+def _help_key(service: str, command: str) -> str:
+    """Key of a help page in the help index"""
+    if service and command:
+        return f"{service}/{command}"
+    return service
+
+def _truncate_help(help_text: str) -> str:
+    """Truncate help text as it can be very long"""
+    if len(help_text) > HELP_TEXT_LIMIT:
+        return help_text[:HELP_TEXT_LIMIT] + "\n... (truncated)"
+    return help_text
+
+def _load_help_index(path: Path = HELP_INDEX_PATH) -> Dict[str, str]:
+    """Load the bundled help index, or return an empty one if there is none"""
+    try:
+        index = json_loads(path.read_bytes())
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable help index {path}: {e}")
+        return {}
+    
+    pages = index.get("help") if isinstance(index, dict) else None
+    if not isinstance(pages, dict):
+        logger.warning(f"Ignoring help index {path}: no \"help\" mapping")
+        return {}
+    
+    logger.info(f"Loaded {len(pages)} help pages for gcloud {index.get('gcloud_version', 'unknown')}")
+    return {key: text for key, text in pages.items() if isinstance(text, str)}
+
+# Potentially dangerous operations
+DANGEROUS_PATTERNS = frozenset({
+    # Shell operators
+    "&&", "||", ";", "|", ">", "<", ">>", "<<",
+    # System commands
+    "sudo", "su", "chmod", "chown", "rm", "del",
+    "eval", "exec", "system", "sh", "bash",
+    # GCP dangerous operations
+    "delete", "destroy", "remove", "terminate",
+    # File operations that could be dangerous
+    "mv", "cp", "move", "copy",
+    # Network operations
+    "curl", "wget", "ssh", "scp", "rsync"
+})
+
+# Suspicious character sequences (none contain letters, so case is irrelevant)
+SUSPICIOUS_CHARS = frozenset({"$(", "`", "${", "\\", "&&", "||"})
+
+def _build_danger_re(needles):
+    """Compile all needles into one bytes regex; words only match as whole words"""
+    alternatives = []
+    # Longest first so ">>" wins over ">"
+    for needle in sorted(needles, key=len, reverse=True):
+        escaped = re.escape(needle.encode("ascii"))
+        alternatives.append(rb"\b" + escaped + rb"\b" if needle.isalpha() else escaped)
+    # Patterns are lowercase and matched against a lowered command, so no IGNORECASE
+    return re.compile(b"|".join(alternatives))
+
+# Every dangerous pattern and suspicious sequence, matched together in one pass
+_DANGER_RE = _build_danger_re(DANGEROUS_PATTERNS | SUSPICIOUS_CHARS)
+
+def _load_default_credentials():
+    """Load and refresh application default credentials (blocking)"""
+    credentials, project = google_auth.default()
+    credentials.refresh(google_auth.transport.requests.Request())
+    return credentials, project
+
+async def _run_cli_command(*cmd: str, timeout: float) -> Tuple[int, bytes, bytes]:
+    """Run a command and collect its output, killing it if it times out"""
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise
+    
+    return process.returncode, stdout, stderr
+
+def _gcloud_config_dir() -> Path:
+    """Locate the gcloud configuration directory the same way gcloud does"""
+    if os.environ.get("CLOUDSDK_CONFIG"):
+        return Path(os.environ["CLOUDSDK_CONFIG"])
+    if sys.platform == "win32" and os.environ.get("APPDATA"):
+        return Path(os.environ["APPDATA"]) / "gcloud"
+    return Path.home() / ".config" / "gcloud"
+
+def _active_gcloud_config() -> Optional[Tuple[str, configparser.ConfigParser]]:
+    """Name and contents of the active gcloud configuration, or None if there are none"""
+    config_dir = _gcloud_config_dir()
+    configurations_dir = config_dir / "configurations"
+    if not configurations_dir.is_dir():
+        return None
+    
+    active = os.environ.get("CLOUDSDK_ACTIVE_CONFIG_NAME")
+    if not active:
+        active_file = config_dir / "active_config"
+        active = active_file.read_text().strip() if active_file.is_file() else "default"
+    
+    config = configparser.ConfigParser()
+    if not config.read(configurations_dir / f"config_{active}"):
+        return None
+    return active, config
+
+def _read_gcloud_config() -> Optional[str]:
+    """Render the active gcloud configuration from its files, or None if there are none"""
+    loaded = _active_gcloud_config()
+    if loaded is None:
+        return None
+    active, config = loaded
+    configurations_dir = _gcloud_config_dir() / "configurations"
+    
+    response_text = "gcloud Configuration:\n"
+    for section in config.sections():
+        response_text += f"[{section}]\n"
+        for key, value in config.items(section):
+            response_text += f"{key} = {value}\n"
+    
+    response_text += "\n\nActive Configurations:\n"
+    for config_file in sorted(configurations_dir.glob("config_*")):
+        name = config_file.name[len("config_"):]
+        marker = " (active)" if name == active else ""
+        response_text += f"{name}{marker}\n"
+    
+    return response_text
+
 class GCPMCPServer:
     def __init__(self):
+        _import_mcp()
         self.server = Server("gcp-cli-server")
+        self._cache: Dict[str, Tuple[float, List[TextContent]]] = {}
+        self._cache_locks = {"auth": asyncio.Lock(), "config": asyncio.Lock()}
+        # Created in run(); until then commands fall back to the default executor
+        self._subprocess_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        # Identical commands already running, shared by concurrent callers
+        self._inflight: Dict[Tuple[str, ...], asyncio.Future] = {}
+        self._help_index = _load_help_index()
         self.setup_handlers()
         
     def setup_handlers(self):
         """Set up MCP server handlers"""
         
-        @self.server.list_tools()
-        async def handle_list_tools() -> List[Tool]:
-            """List available tools"""
-            return [
-                Tool(
-                    name="cloud-sec-gcloud-cli",
-                    description="Execute Google Cloud CLI commands safely",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "command": {
-                                "type": "string",
-                                "description": "The gcloud CLI command to execute (without 'gcloud' prefix)"
-                            },
-                            "timeout": {
-                                "type": "integer",
-                                "description": "Command timeout in seconds (default: 30)",
-                                "default": 30
-                            }
+        # The tool schemas never change, so build them once
+        self._tools = (
+            Tool(
+                name="cloud-sec-gcloud-cli",
+                description="Execute Google Cloud CLI commands safely",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "command": {
+                            "type": ["string", "array"],
+                            "items": {"type": "string"},
+                            "description": "The gcloud CLI command to execute (without 'gcloud' prefix), as a string or a list of arguments"
                         },
-                        "required": ["command"]
-                    }
-                ),
-                Tool(
-                    name="cloud-sec-gcloud-auth-check",
-                    description="Check Google Cloud CLI authentication status",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {}
-                    }
+                        "timeout": {
+                            "type": "integer",
+                            "description": "Command timeout in seconds (default: 30)",
+                            "default": 30
+                        }
+                    },
+                    "required": ["command"]
+                }
+            ),
+            Tool(
+                name="cloud-sec-gcloud-auth-check",
+                description=(
+                    "Check which account the Google Cloud CLI (gcloud, gsutil, bq) runs commands as, "
+                    "and the application default credentials used by client libraries"
                 ),
-                Tool(
-                    name="cloud-sec-gcloud-config-check",
-                    description="Check Google Cloud CLI configuration",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {}
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "force": {
+                            "type": "boolean",
+                            "description": "Bypass the 60 second result cache (default: false)",
+                            "default": False
+                        }
                     }
-                ),
-                Tool(
-                    name="cloud-sec-gcloud-help",
-                    description="Get help for Google Cloud CLI commands",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "service": {
-                                "type": "string",
-                                "description": "GCP service name (optional, e.g., 'compute', 'storage', 'iam')"
-                            },
-                            "command": {
-                                "type": "string",
-                                "description": "Specific command to get help for (optional)"
-                            }
+                }
+            ),
+            Tool(
+                name="cloud-sec-gcloud-config-check",
+                description="Check Google Cloud CLI configuration",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "force": {
+                            "type": "boolean",
+                            "description": "Bypass the 60 second result cache (default: false)",
+                            "default": False
                         }
                     }
-                ),
-                Tool(
-                    name="cloud-sec-gsutil-cli",
-                    description="Execute Google Cloud Storage gsutil commands safely",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "command": {
-                                "type": "string",
-                                "description": "The gsutil command to execute (without 'gsutil' prefix)"
-                            },
-                            "timeout": {
-                                "type": "integer",
-                                "description": "Command timeout in seconds (default: 30)",
-                                "default": 30
-                            }
+                }
+            ),
+            Tool(
+                name="cloud-sec-gcloud-help",
+                description="Get help for Google Cloud CLI commands",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "service": {
+                            "type": "string",
+                            "description": "GCP service name (optional, e.g., 'compute', 'storage', 'iam')"
                         },
-                        "required": ["command"]
+                        "command": {
+                            "type": "string",
+                            "description": "Specific command to get help for (optional)"
+                        }
                     }
-                ),
-                Tool(
-                    name="cloud-sec-bq-cli",
-                    description="Execute Google BigQuery bq commands safely",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "command": {
-                                "type": "string",
-                                "description": "The bq command to execute (without 'bq' prefix)"
-                            },
-                            "timeout": {
-                                "type": "integer",
-                                "description": "Command timeout in seconds (default: 30)",
-                                "default": 30
-                            }
+                }
+            ),
+            Tool(
+                name="cloud-sec-gsutil-cli",
+                description="Execute Google Cloud Storage gsutil commands safely",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "command": {
+                            "type": ["string", "array"],
+                            "items": {"type": "string"},
+                            "description": "The gsutil command to execute (without 'gsutil' prefix), as a string or a list of arguments"
                         },
-                        "required": ["command"]
-                    }
-                )
-            ]
+                        "timeout": {
+                            "type": "integer",
+                            "description": "Command timeout in seconds (default: 30)",
+                            "default": 30
+                        }
+                    },
+                    "required": ["command"]
+                }
+            ),
+            Tool(
+                name="cloud-sec-bq-cli",
+                description="Execute Google BigQuery bq commands safely",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "command": {
+                            "type": ["string", "array"],
+                            "items": {"type": "string"},
+                            "description": "The bq command to execute (without 'bq' prefix), as a string or a list of arguments"
+                        },
+                        "timeout": {
+                            "type": "integer",
+                            "description": "Command timeout in seconds (default: 30)",
+                            "default": 30
+                        }
+                    },
+                    "required": ["command"]
+                }
+            )
+        )
+        
+        @self.server.list_tools()
+        async def handle_list_tools() -> List[Tool]:
+            """List available tools"""
+            return self._tools
+
+        self._dispatch = {
+            "cloud-sec-gcloud-cli": partial(self._execute, "gcloud"),
+            "cloud-sec-gcloud-auth-check": lambda arguments: self._check_gcloud_auth(arguments.get("force", False)),
+            "cloud-sec-gcloud-config-check": lambda arguments: self._check_gcloud_config(arguments.get("force", False)),
+            "cloud-sec-gcloud-help": self._get_gcloud_help,
+            "cloud-sec-gsutil-cli": partial(self._execute, "gsutil"),
+            "cloud-sec-bq-cli": partial(self._execute, "bq"),
+        }
 
         @self.server.call_tool()
         async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
             """Handle tool calls"""
-            
-            if name == "cloud-sec-gcloud-cli":
-                return await self._execute_gcloud_command(arguments)
-            elif name == "cloud-sec-gcloud-auth-check":
-                return await self._check_gcloud_auth()
-            elif name == "cloud-sec-gcloud-config-check":
-                return await self._check_gcloud_config()
-            elif name == "cloud-sec-gcloud-help":
-                return await self._get_gcloud_help(arguments)
-            elif name == "cloud-sec-gsutil-cli":
-                return await self._execute_gsutil_command(arguments)
-            elif name == "cloud-sec-bq-cli":
-                return await self._execute_bq_command(arguments)
-            else:
+            handler = self._dispatch.get(name)
+            if handler is None:
                 return [TextContent(
                     type="text",
                     text=f"Unknown tool: {name}"
                 )]
+            return await handler(arguments)
 
-    async def _execute_gcloud_command(self, arguments: Dict[str, Any]) -> List[TextContent]:
-        """Execute gcloud CLI command safely"""
-        try:
-            command = arguments.get("command", "").strip()
-            timeout = arguments.get("timeout", 30)
-            
-            if not command:
-                return [TextContent(
-                    type="text",
-                    text="Error: No command provided"
-                )]
-            
-            # Validate command doesn't contain dangerous operations
-            if not self._is_safe_command(command):
-                return [TextContent(
-                    type="text",
-                    text="Error: Command contains potentially dangerous operations"
-                )]
-            
-            # Prepare full gcloud command
-            full_command = f"gcloud {command}"
-            
-            return await self._execute_command(full_command, timeout)
-            
-        except Exception as e:
-            return [TextContent(
-                type="text",
-                text=f"Error executing gcloud command: {str(e)}"
-            )]
-
-    async def _execute_gsutil_command(self, arguments: Dict[str, Any]) -> List[TextContent]:
-        """Execute gsutil command safely"""
+    async def _execute(self, binary: str, arguments: Dict[str, Any]) -> List[TextContent]:
+        """Execute a gcloud, gsutil or bq command safely"""
         try:
-            command = arguments.get("command", "").strip()
-            timeout = arguments.get("timeout", 30)
-            
-            if not command:
-                return [TextContent(
-                    type="text",
-                    text="Error: No command provided"
-                )]
+            command = arguments.get("command", "")
             
-            # Validate command doesn't contain dangerous operations
-            if not self._is_safe_command(command):
+            try:
+                timeout = _parse_timeout(arguments.get("timeout"))
+            except ValueError as e:
                 return [TextContent(
                     type="text",
-                    text="Error: Command contains potentially dangerous operations"
+                    text=f"Error: {e}"
                 )]
             
-            # Prepare full gsutil command
-            full_command = f"gsutil {command}"
-            
-            return await self._execute_command(full_command, timeout)
-            
-        except Exception as e:
-            return [TextContent(
-                type="text",
-                text=f"Error executing gsutil command: {str(e)}"
-            )]
-
-    async def _execute_bq_command(self, arguments: Dict[str, Any]) -> List[TextContent]:
-        """Execute bq command safely"""
-        try:
-            command = arguments.get("command", "").strip()
-            timeout = arguments.get("timeout", 30)
+            # Commands may arrive pre-tokenized, which skips shlex entirely
+            args: Optional[List[str]] = None
+            if isinstance(command, list):
+                args = [str(arg) for arg in command]
+                command = shlex.join(args)
+            command = command.strip()
             
             if not command:
                 return [TextContent(
@@ -238,64 +574,69 @@ class GCPMCPServer:
                     text="Error: Command contains potentially dangerous operations"
                 )]
             
-            # Prepare full bq command
-            full_command = f"bq {command}"
-            
-            return await self._execute_command(full_command, timeout)
+            return await self._execute_command(binary, command, timeout, args)
             
         except Exception as e:
             return [TextContent(
                 type="text",
-                text=f"Error executing bq command: {str(e)}"
+                text=f"Error executing {binary} command: {str(e)}"
             )]
 
-    async def _execute_command(self, full_command: str, timeout: int) -> List[TextContent]:
+    async def _execute_command(
+        self,
+        binary: str,
+        command: str,
+        timeout: int,
+        args: Optional[List[str]] = None
+    ) -> List[Union[TextContent, EmbeddedResource]]:
         """Execute a command safely"""
         try:
-            # Parse command safely
-            try:
-                cmd_parts = shlex.split(full_command)
-            except ValueError as e:
-                return [TextContent(
-                    type="text",
-                    text=f"Error parsing command: {str(e)}"
-                )]
+            full_command = f"{binary} {command}"
+            
+            # Parse only the user-supplied part; the binary is already a token
+            if args is None:
+                try:
+                    args = shlex.split(command)
+                except ValueError as e:
+                    return [TextContent(
+                        type="text",
+                        text=f"Error parsing command: {str(e)}"
+                    )]
+            cmd_parts = [binary, *args]
             
             # Execute command
             logger.info(f"Executing: {full_command}")
             
-            # Create subprocess
-            process = await asyncio.create_subprocess_exec(
-                *cmd_parts,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+            returncode, stdout, stderr, truncated = await self._run_coalesced(cmd_parts, timeout)
             
-            # Use asyncio.wait_for to handle timeout
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(), 
-                timeout=timeout
-            )
-            
-            # Prepare response
-            response_text = f"Command: {full_command}\n"
-            response_text += f"Exit Code: {process.returncode}\n\n"
+            # Prepare response as raw bytes and decode it once at the end
+            response = bytearray(f"Command: {full_command}\nExit Code: {returncode}\n\n".encode("utf-8"))
             
             if stdout:
-                response_text += f"Output:\n{stdout.decode('utf-8')}\n"
+                response += b"Output:\n"
+                response += stdout
+                response += b"\n"
             
             if stderr:
-                response_text += f"Error:\n{stderr.decode('utf-8')}\n"
+                response += b"Error:\n"
+                response += stderr
+                response += b"\n"
+            
+            if truncated:
+                response += f"... (output truncated to {MAX_OUTPUT_BYTES} bytes per stream)\n".encode("utf-8")
+            
+            if COMPRESS_THRESHOLD and len(response) > COMPRESS_THRESHOLD:
+                return await self._compressed_response(binary, response)
             
             return [TextContent(
                 type="text",
-                text=response_text
+                text=response.decode("utf-8", errors="replace")
             )]
             
-        except asyncio.TimeoutError:
+        except (subprocess.TimeoutExpired, asyncio.TimeoutError):
             return [TextContent(
                 type="text",
-                text=f"Error: Command timed out after {timeout} seconds"
+                text=f"Error: Command timed out after {timeout:g} seconds"
             )]
         except Exception as e:
             return [TextContent(
@@ -303,44 +644,191 @@ class GCPMCPServer:
                 text=f"Error executing command: {str(e)}"
             )]
 
-    async def _check_gcloud_auth(self) -> List[TextContent]:
-        """Check Google Cloud CLI authentication status"""
-        try:
-            # Check if gcloud CLI is installed
-            process = await asyncio.create_subprocess_exec(
-                "gcloud", "version",
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+    async def _compressed_response(
+        self, binary: str, response: bytearray
+    ) -> List[Union[TextContent, EmbeddedResource]]:
+        """Send a large response as a text preview plus the full output gzip-compressed"""
+        # zlib releases the GIL, so compress off the event loop
+        compressed = await asyncio.to_thread(gzip.compress, response, 1)
+        
+        preview = response[:COMPRESSED_PREVIEW_BYTES].decode("utf-8", errors="replace")
+        preview += (
+            f"\n... ({len(response)} bytes in total; the full output is attached "
+            f"gzip-compressed, {len(compressed)} bytes)\n"
+        )
+        
+        return [
+            TextContent(
+                type="text",
+                text=preview
+            ),
+            EmbeddedResource(
+                type="resource",
+                resource=BlobResourceContents(
+                    uri=f"gcp-cli://output/{binary}.txt.gz",
+                    mimeType="application/gzip",
+                    blob=base64.b64encode(compressed).decode("ascii")
+                )
             )
+        ]
+    
+    def _run_in_pool(self, cmd_parts: List[str], timeout: float) -> asyncio.Future:
+        """Start a command in a pool worker so the event loop never forks or blocks"""
+        loop = asyncio.get_running_loop()
+        pool = self._subprocess_pool
+        try:
+            future = loop.run_in_executor(pool, _run_blocking_subprocess, cmd_parts, timeout)
+        except BrokenProcessPool:
+            # The job never started, so it is safe to submit it to a fresh pool
+            pool = self._replace_broken_pool(pool)
+            future = loop.run_in_executor(pool, _run_blocking_subprocess, cmd_parts, timeout)
+        
+        future.add_done_callback(lambda done: self._check_pool(pool, done))
+        return future
+    
+    def _check_pool(self, pool: Optional[concurrent.futures.ProcessPoolExecutor], done: asyncio.Future) -> None:
+        """Replace the pool once a job reports that one of its workers died"""
+        if not done.cancelled() and isinstance(done.exception(), BrokenProcessPool):
+            self._replace_broken_pool(pool)
+    
+    def _replace_broken_pool(
+        self, pool: Optional[concurrent.futures.ProcessPoolExecutor]
+    ) -> Optional[concurrent.futures.ProcessPoolExecutor]:
+        """Swap a broken pool for a new one, unless that already happened"""
+        if pool is not None and pool is self._subprocess_pool:
+            logger.warning("A CLI worker process died; starting a new worker pool")
+            pool.shutdown(wait=False, cancel_futures=True)
+            self._subprocess_pool = _create_subprocess_pool()
+        return self._subprocess_pool
+    
+    async def _run_coalesced(self, cmd_parts: List[str], timeout: float) -> Tuple[int, bytes, bytes, bool]:
+        """Run a command, joining an identical read-only one that is already in flight
+
+        The wait is bounded by this caller's timeout, including any time spent
+        queued for a free worker (raises asyncio.TimeoutError).
+        """
+        # Anything that may change state runs as its own process, every time
+        if not _is_read_only(cmd_parts):
+            # On timeout wait_for cancels the job, which drops it if still queued
+            return await asyncio.wait_for(self._run_in_pool(cmd_parts, timeout), timeout)
+        
+        key = tuple(cmd_parts)
+        future = self._inflight.get(key)
+        if future is None:
+            future = self._run_in_pool(cmd_parts, timeout)
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            logger.info(f"Joining in-flight command: {shlex.join(cmd_parts)}")
+        
+        # One caller being cancelled or timing out must not cancel the shared run
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+    
+    async def _cached_check(
+        self,
+        key: str,
+        check: Callable[[], Awaitable[List[TextContent]]],
+        force: bool = False
+    ) -> List[TextContent]:
+        """Serve a status check from the cache, running at most one refresh at a time"""
+        async with self._cache_locks[key]:
+            cached = self._cache.get(key)
+            if not force and cached is not None and time.monotonic() - cached[0] < STATUS_CACHE_TTL:
+                return cached[1]
             
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(), 
+            response = await check()
+            # Don't pin a transient failure for the whole TTL
+            if not response[0].text.startswith("Error"):
+                self._cache[key] = (time.monotonic(), response)
+            return response
+
+    async def _check_gcloud_auth(self, force: bool = False) -> List[TextContent]:
+        """Check Google Cloud authentication status"""
+        return await self._cached_check("auth", self._load_gcloud_auth, force)
+
+    async def _load_gcloud_auth(self) -> List[TextContent]:
+        """Run the authentication check, reading the gcloud account from its config files"""
+        try:
+            loaded = _active_gcloud_config()
+        except (OSError, configparser.Error) as e:
+            logger.warning(f"Could not read gcloud configuration files: {e}")
+            loaded = None
+        
+        # Environment overrides win over the configuration, as they do for gcloud
+        name, config = loaded or ("Unknown", configparser.ConfigParser())
+        account = os.environ.get("CLOUDSDK_CORE_ACCOUNT") or config.get("core", "account", fallback=None)
+        if not account:
+            # No account on file; ask gcloud itself
+            return await self._check_gcloud_auth_cli()
+        project = os.environ.get("CLOUDSDK_CORE_PROJECT") or config.get("core", "project", fallback=None)
+        
+        response_text = "gcloud CLI Authentication Status (used by gcloud, gsutil and bq):\n"
+        response_text += f"Active account: {account}\n"
+        response_text += f"Project: {project or 'Not set'}\n"
+        response_text += f"Configuration: {name}\n"
+        
+        if google_auth is not None:
+            response_text += "\n" + await self._describe_default_credentials(account)
+        
+        return [TextContent(
+            type="text",
+            text=response_text
+        )]
+
+    async def _describe_default_credentials(self, gcloud_account: str) -> str:
+        """Describe the application default credentials, which gcloud itself does not use"""
+        response_text = "Application Default Credentials (used by client libraries, not by gcloud):\n"
+        try:
+            # google-auth does blocking file and network I/O
+            credentials, project = await asyncio.wait_for(
+                asyncio.to_thread(_load_default_credentials),
                 timeout=10
             )
+        except google_auth.exceptions.DefaultCredentialsError:
+            return response_text + "Not configured\n"
+        except asyncio.TimeoutError:
+            return response_text + "Check timed out\n"
+        except Exception as e:
+            return response_text + f"Could not load: {str(e)}\n"
+        
+        account = (
+            getattr(credentials, "service_account_email", None)
+            or getattr(credentials, "account", None)
+            or "Unknown"
+        )
+        response_text += f"Account: {account}\n"
+        response_text += f"Project: {project or 'Not set'}\n"
+        response_text += f"Credentials valid: {'Yes' if credentials.valid else 'No'}\n"
+        if account not in ("Unknown", gcloud_account):
+            response_text += "Note: this is not the account gcloud runs commands as\n"
+        return response_text
+
+    async def _check_gcloud_auth_cli(self) -> List[TextContent]:
+        """Check Google Cloud CLI authentication status with the gcloud CLI"""
+        try:
+            # Check the installation and authentication status concurrently
+            version_result, auth_result = await asyncio.gather(
+                _run_cli_command("gcloud", "version", timeout=10),
+                _run_cli_command("gcloud", "auth", "list", timeout=10),
+                return_exceptions=True
+            )
             
-            if process.returncode != 0:
+            for result in (version_result, auth_result):
+                if isinstance(result, BaseException):
+                    raise result
+            
+            if version_result[0] != 0:
                 return [TextContent(
                     type="text",
                     text="gcloud CLI is not installed or not accessible"
                 )]
             
-            version_info = stdout.decode('utf-8').strip()
-            
-            # Check authentication status
-            auth_process = await asyncio.create_subprocess_exec(
-                "gcloud", "auth", "list",
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            auth_stdout, auth_stderr = await asyncio.wait_for(
-                auth_process.communicate(),
-                timeout=10
-            )
+            version_info = version_result[1].decode('utf-8').strip()
+            auth_returncode, auth_stdout, auth_stderr = auth_result
             
             response_text = f"gcloud CLI Version:\n{version_info}\n\n"
             
-            if auth_process.returncode == 0:
+            if auth_returncode == 0:
                 response_text += "Authentication Status:\n"
                 response_text += auth_stdout.decode('utf-8')
             else:
@@ -363,46 +851,49 @@ class GCPMCPServer:
                 text=f"Error checking authentication: {str(e)}"
             )]
 
-    async def _check_gcloud_config(self) -> List[TextContent]:
+    async def _check_gcloud_config(self, force: bool = False) -> List[TextContent]:
         """Check Google Cloud CLI configuration"""
+        return await self._cached_check("config", self._load_gcloud_config, force)
+
+    async def _load_gcloud_config(self) -> List[TextContent]:
+        """Run the configuration check, preferring the config files over the CLI"""
         try:
-            # Check current configuration
-            config_process = await asyncio.create_subprocess_exec(
-                "gcloud", "config", "list",
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            config_stdout, config_stderr = await asyncio.wait_for(
-                config_process.communicate(),
-                timeout=10
-            )
-            
-            response_text = "gcloud Configuration:\n"
-            
-            if config_process.returncode == 0:
-                response_text += config_stdout.decode('utf-8')
-            else:
-                response_text += f"Error: {config_stderr.decode('utf-8')}"
-            
-            # Also check active configuration
-            active_config_process = await asyncio.create_subprocess_exec(
-                "gcloud", "config", "configurations", "list",
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            active_stdout, active_stderr = await asyncio.wait_for(
-                active_config_process.communicate(),
-                timeout=10
+            response_text = _read_gcloud_config()
+        except (OSError, configparser.Error) as e:
+            logger.warning(f"Could not read gcloud configuration files: {e}")
+            response_text = None
+        
+        if response_text is None:
+            return await self._check_gcloud_config_cli()
+        
+        return [TextContent(
+            type="text",
+            text=response_text
+        )]
+
+    async def _check_gcloud_config_cli(self) -> List[TextContent]:
+        """Check Google Cloud CLI configuration with the gcloud CLI"""
+        try:
+            # Check the current and the available configurations concurrently
+            results = await asyncio.gather(
+                _run_cli_command("gcloud", "config", "list", timeout=10),
+                _run_cli_command("gcloud", "config", "configurations", "list", timeout=10),
+                return_exceptions=True
             )
             
-            response_text += "\n\nActive Configurations:\n"
+            sections = []
+            for title, result in zip(("gcloud Configuration:\n", "Active Configurations:\n"), results):
+                if isinstance(result, asyncio.TimeoutError):
+                    body = "Error: Command timed out"
+                elif isinstance(result, BaseException):
+                    body = f"Error: {str(result)}"
+                elif result[0] == 0:
+                    body = result[1].decode('utf-8')
+                else:
+                    body = f"Error: {result[2].decode('utf-8')}"
+                sections.append(title + body)
             
-            if active_config_process.returncode == 0:
-                response_text += active_stdout.decode('utf-8')
-            else:
-                response_text += f"Error: {active_stderr.decode('utf-8')}"
+            response_text = "\n\n".join(sections)
             
             return [TextContent(
                 type="text",
@@ -426,6 +917,14 @@ class GCPMCPServer:
             service = arguments.get("service", "")
             command = arguments.get("command", "")
             
+            # Serve pre-rendered help without starting gcloud at all
+            help_text = self._help_index.get(_help_key(service, command))
+            if help_text is not None:
+                return [TextContent(
+                    type="text",
+                    text=help_text
+                )]
+            
             if service and command:
                 cmd = ["gcloud", service, command, "--help"]
             elif service:
@@ -445,14 +944,9 @@ class GCPMCPServer:
             )
             
             if process.returncode == 0:
-                # Truncate help text as it can be very long
-                help_text = stdout.decode('utf-8')
-                if len(help_text) > 3000:
-                    help_text = help_text[:3000] + "\n... (truncated)"
-                
                 return [TextContent(
                     type="text",
-                    text=help_text
+                    text=_truncate_help(stdout.decode('utf-8'))
                 )]
             else:
                 return [TextContent(
@@ -473,46 +967,28 @@ class GCPMCPServer:
 
     def _is_safe_command(self, command: str) -> bool:
         """Check if command is safe to execute"""
-        # List of potentially dangerous operations
-        dangerous_patterns = [
-            # Shell operators
-            "&&", "||", ";", "|", ">", "<", ">>", "<<",
-            # System commands
-            "sudo", "su", "chmod", "chown", "rm", "del",
-            "eval", "exec", "system", "sh", "bash",
-            # GCP dangerous operations
-            "delete", "destroy", "remove", "terminate",
-            # File operations that could be dangerous
-            "mv", "cp", "move", "copy",
-            # Network operations
-            "curl", "wget", "ssh", "scp", "rsync"
-        ]
+        # Cheap checks first, so obviously malformed input never reaches the scan
+        if not command or "\x00" in command:
+            logger.warning(f"Blocked empty command or command with NUL byte: {command!r}")
+            return False
+        if command[0] in "-/":
+            logger.warning(f"Blocked command starting with dash or slash: {command}")
+            return False
         
-        command_lower = command.lower()
+        # Lower once, as bytes, and scan for every pattern in one pass
+        command_lower = command.encode("utf-8", "replace").lower()
+        hits = {match.group().decode("ascii") for match in _DANGER_RE.finditer(command_lower)}
         
         # Check for dangerous patterns
-        for pattern in dangerous_patterns:
-            if pattern in command_lower:
-                # Allow safe delete operations for GCP resources
-                if pattern == "delete" and any(safe_delete in command_lower for safe_delete in [
-                    "instances list", "projects list", "images list", 
-                    "disks list", "snapshots list", "--dry-run", "--help"
-                ]):
-                    continue
-                logger.warning(f"Blocked potentially dangerous command: {command}")
-                return False
-        
-        # Additional safety checks
-        if command.startswith("-") or command.startswith("--"):
-            logger.warning(f"Blocked command starting with dash: {command}")
+        dangerous_hits = hits & DANGEROUS_PATTERNS
+        if dangerous_hits:
+            logger.warning(f"Blocked potentially dangerous command: {command}")
             return False
         
         # Check for suspicious character sequences
-        suspicious_chars = ["$(", "`", "${", "\\", "&&", "||"]
-        for char_seq in suspicious_chars:
-            if char_seq in command:
-                logger.warning(f"Blocked command with suspicious characters: {command}")
-                return False
+        if hits & SUSPICIOUS_CHARS:
+            logger.warning(f"Blocked command with suspicious characters: {command}")
+            return False
         
         return True
 
@@ -520,24 +996,76 @@ class GCPMCPServer:
         """Run the MCP server"""
         logger.info("Starting GCP CLI MCP Server")
         
-        # Initialize and run server
-        async with stdio_server() as streams:
-            await self.server.run(
-                streams[0], 
-                streams[1], 
-                InitializationOptions(
-                    server_name="gcp-cli-server",
-                    server_version="1.0.0",
-                    capabilities={}
+        self._subprocess_pool = _create_subprocess_pool()
+        try:
+            # Initialize and run server
+            async with stdio_server() as streams:
+                await self.server.run(
+                    streams[0], 
+                    streams[1], 
+                    InitializationOptions(
+                        server_name="gcp-cli-server",
+                        server_version="1.0.0",
+                        capabilities={}
+                    )
                 )
-            )
+        finally:
+            self._subprocess_pool.shutdown(wait=False, cancel_futures=True)
+            self._subprocess_pool = None
+
+def _event_loop_factory() -> Optional[Callable[[], asyncio.AbstractEventLoop]]:
+    """Pick the event loop implementation; None means the asyncio default"""
+    choice = os.environ.get("GCP_MCP_EVENT_LOOP", "").lower()
+    
+    # The io_uring loop is experimental, so it is strictly opt-in
+    if choice == "kloop":
+        if sys.platform != "linux":
+            logger.warning("GCP_MCP_EVENT_LOOP=kloop needs Linux; using the default loop")
+        else:
+            try:
+                import kloop
+                return kloop.KLoopPolicy().new_event_loop
+            except ImportError:
+                logger.warning("GCP_MCP_EVENT_LOOP=kloop but kloop is not installed; using the default loop")
+    
+    if uvloop is not None and choice != "asyncio":
+        return uvloop.new_event_loop
+    return None
+
+def _run_event_loop(
+    coro: Awaitable[Any], loop_factory: Optional[Callable[[], asyncio.AbstractEventLoop]]
+) -> Any:
+    """Run a coroutine to completion on a loop from loop_factory (None: the default loop)"""
+    if sys.version_info >= (3, 11):
+        with asyncio.Runner(loop_factory=loop_factory) as runner:
+            return runner.run(coro)
+    
+    # asyncio.Runner needs Python 3.11; drive the loop by hand on older versions
+    if loop_factory is None:
+        return asyncio.run(coro)
+    loop = loop_factory()
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(coro)
+    finally:
+        try:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
 
 def main():
     """Main entry point"""
+    try:
+        _import_mcp()
+    except ImportError:
+        print("Error: MCP library not installed. Install with: pip install mcp")
+        sys.exit(1)
+    
     server = GCPMCPServer()
     
     try:
-        asyncio.run(server.run())
+        _run_event_loop(server.run(), _event_loop_factory())
     except KeyboardInterrupt:
         logger.info("Server stopped by user")
     except Exception as e:
@@ -0,0 +1,15 @@
+"""
+Gunicorn configuration for the awscli_mcp Flask API.
+Run with: gunicorn awscli_mcp:app
+"""
+
+import multiprocessing
+
+bind = "0.0.0.0:5001"
+
+# Requests mostly wait on AWS API calls, so threads per worker keep
+# slow IAM scans from blocking other requests
+workers = multiprocessing.cpu_count()
+worker_class = "gthread"
+threads = 8
+timeout = 120
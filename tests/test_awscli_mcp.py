@@ -0,0 +1,77 @@
+"""Regression cases for the Flask AWS CLI service"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("flask_cors")
+pytest.importorskip("boto3")
+
+import awscli_mcp
+
+
+REPORT = b"user,mfa_active\n<root_account>,false\nalice,false\nbob,true\n"
+
+
+class FakeIAM:
+    def __init__(self, generated_at):
+        self.generated_at = generated_at
+        self.fetches = 0
+
+    def generate_credential_report(self):
+        return {"State": "COMPLETE"}
+
+    def get_credential_report(self):
+        self.fetches += 1
+        return {"Content": REPORT, "GeneratedTime": self.generated_at}
+
+
+@pytest.fixture
+def credential_report(monkeypatch):
+    monkeypatch.setattr(awscli_mcp, "_credential_report", {"rows": None, "generated_at": None})
+
+
+def test_recent_report_is_used_and_cached(credential_report, monkeypatch):
+    iam = FakeIAM(datetime.now(timezone.utc) - timedelta(hours=1))
+    monkeypatch.setattr(awscli_mcp, "IAM", iam)
+
+    assert awscli_mcp._users_without_mfa_from_report() == ["alice"]
+    assert awscli_mcp._users_without_mfa_from_report() == ["alice"]
+    assert iam.fetches == 1
+
+
+def test_stale_report_falls_back(credential_report, monkeypatch):
+    monkeypatch.setattr(awscli_mcp, "IAM", FakeIAM(datetime.now(timezone.utc) - timedelta(hours=5)))
+
+    assert awscli_mcp._users_without_mfa_from_report() is None
+
+
+def test_cached_report_is_refetched_once_it_ages_out(credential_report, monkeypatch):
+    iam = FakeIAM(datetime.now(timezone.utc) - timedelta(hours=1))
+    monkeypatch.setattr(awscli_mcp, "IAM", iam)
+    awscli_mcp._users_without_mfa_from_report()
+
+    awscli_mcp._credential_report["generated_at"] -= timedelta(hours=4)
+    assert awscli_mcp._users_without_mfa_from_report() == ["alice"]
+    assert iam.fetches == 2
+
+
+def test_run_aws_without_the_cli_returns_json(monkeypatch, tmp_path):
+    # An empty PATH, so the aws binary can't be found
+    monkeypatch.setenv("PATH", str(tmp_path))
+    client = awscli_mcp.app.test_client()
+
+    response = client.post("/run-aws", json={"command": "aws sts get-caller-identity"})
+
+    assert response.status_code == 500
+    assert "error" in response.get_json()
+
+
+def test_run_aws_rejects_other_commands():
+    client = awscli_mcp.app.test_client()
+
+    response = client.post("/run-aws", json={"command": "ls -la"})
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()
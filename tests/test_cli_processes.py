@@ -0,0 +1,74 @@
+"""Regression cases for how the AWS and Azure CLI servers run and time out commands"""
+
+import asyncio
+import importlib
+import sys
+import time
+
+import pytest
+
+pytest.importorskip("mcp")
+
+SERVERS = [
+    ("awscli_claude", "AWSMCPServer", "_execute_aws_command"),
+    ("azurecli_claude", "AzureMCPServer", "_execute_azure_command"),
+]
+
+
+def _gone(pid):
+    """Whether a process has exited (zombies awaiting their new parent count)"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] == "Z"
+    except FileNotFoundError:
+        return True
+
+
+@pytest.mark.parametrize("module_name, class_name, execute", SERVERS)
+@pytest.mark.parametrize("value, expected", [(None, 30), (5, 5), ("30", 30), (0.5, 0.5)])
+def test_timeout_accepted(module_name, class_name, execute, value, expected):
+    module = importlib.import_module(module_name)
+    assert module._parse_timeout(value) == expected
+
+
+@pytest.mark.parametrize("module_name, class_name, execute", SERVERS)
+@pytest.mark.parametrize("value", ["abc", True, 0, -1, float("nan"), float("inf"), [30]])
+def test_invalid_timeout_rejected_before_spawning(module_name, class_name, execute, value, monkeypatch):
+    module = importlib.import_module(module_name)
+
+    async def no_spawn(*args, **kwargs):
+        raise AssertionError("a process was started")
+
+    monkeypatch.setattr(module.asyncio, "create_subprocess_exec", no_spawn)
+
+    async def run():
+        server = getattr(module, class_name)()
+        return await getattr(server, execute)({"command": "--version", "timeout": value})
+
+    result = asyncio.run(run())
+    assert result[0].text == "Error: timeout must be a positive number of seconds"
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="reads /proc")
+@pytest.mark.parametrize("module_name, class_name, execute", SERVERS)
+def test_timeout_kills_grandchildren(module_name, class_name, execute, tmp_path):
+    module = importlib.import_module(module_name)
+    pid_file = tmp_path / "grandchild.pid"
+    # A launcher script whose child keeps the output pipes open
+    cmd_parts = ["sh", "-c", f"sleep 30 & echo $! > {pid_file}; wait"]
+
+    async def run():
+        server = getattr(module, class_name)()
+        started = time.monotonic()
+        with pytest.raises(asyncio.TimeoutError):
+            await server._run_cli(cmd_parts, timeout=0.5)
+        assert time.monotonic() - started < 5
+        assert server._processes == {}
+
+    asyncio.run(run())
+
+    grandchild = int(pid_file.read_text())
+    deadline = time.monotonic() + 5
+    while not _gone(grandchild) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert _gone(grandchild)
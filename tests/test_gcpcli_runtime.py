@@ -0,0 +1,56 @@
+"""Regression cases for how the GCP CLI server runs commands"""
+
+import subprocess
+import sys
+import time
+
+import pytest
+
+from gcpcli_claude import _load_help_index, _run_blocking_subprocess
+
+
+def _gone(pid):
+    """Whether a process has exited (zombies awaiting their new parent count)"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] == "Z"
+    except FileNotFoundError:
+        return True
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="reads /proc")
+def test_timeout_is_not_held_up_by_grandchildren(tmp_path):
+    pid_file = tmp_path / "grandchild.pid"
+    # The shell exits at once, but its background child keeps the output pipes open
+    cmd_parts = ["sh", "-c", f"sleep 30 & echo $! > {pid_file}; echo hi"]
+
+    started = time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired):
+        _run_blocking_subprocess(cmd_parts, timeout=0.5)
+    assert time.monotonic() - started < 5
+
+    grandchild = int(pid_file.read_text())
+    deadline = time.monotonic() + 5
+    while not _gone(grandchild) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert _gone(grandchild)
+
+
+@pytest.mark.parametrize("content", [
+    b"{not json",
+    b"[]",
+    b'{"gcloud_version": "1"}',
+    b'{"help": ["compute"]}',
+    b"\xff\xfe",
+])
+def test_malformed_help_index_is_ignored(tmp_path, content):
+    path = tmp_path / "gcloud_help_index.json"
+    path.write_bytes(content)
+    assert _load_help_index(path) == {}
+
+
+def test_help_index_loads_text_pages(tmp_path):
+    path = tmp_path / "gcloud_help_index.json"
+    path.write_bytes(b'{"help": {"compute": "compute help", "bad": 1}}')
+    assert _load_help_index(path) == {"compute": "compute help"}
+    assert _load_help_index(tmp_path / "missing.json") == {}
@@ -0,0 +1,67 @@
+"""Regression cases for the GCP CLI server's command safety checks"""
+
+import pytest
+
+pytest.importorskip("mcp")
+
+from gcpcli_claude import GCPMCPServer, _is_read_only
+
+
+@pytest.fixture(scope="module")
+def server():
+    return GCPMCPServer()
+
+
+@pytest.mark.parametrize("command", [
+    # Every delete stays blocked, whatever else the command mentions
+    "compute instances delete vm1",
+    "compute disks delete disks list --zone z --quiet",
+    'compute instances delete vm1 --description="instances list"',
+    "projects delete p --help",
+    "compute snapshots delete s --dry-run",
+    "Compute Instances DELETE vm1",
+    # Shell operators and substitutions
+    "projects list && rm -rf /",
+    "projects list; id",
+    "config get `id`",
+    "config get $(id)",
+    # Malformed input
+    "",
+    "projects list\x00",
+    "--help",
+    "/bin/sh",
+])
+def test_blocked(server, command):
+    assert server._is_safe_command(command) is False
+
+
+@pytest.mark.parametrize("command", [
+    "compute instances list",
+    "projects list --format=json",
+    "iam roles describe roles/viewer",
+    "storage ls gs://bucket",
+])
+def test_allowed(server, command):
+    assert server._is_safe_command(command) is True
+
+
+@pytest.mark.parametrize("cmd_parts, read_only", [
+    (["gcloud", "compute", "instances", "list", "--zone", "z"], True),
+    (["gcloud", "projects", "describe", "p"], True),
+    (["gcloud", "projects", "get-iam-policy", "p"], True),
+    (["gsutil", "ls", "gs://bucket"], True),
+    (["bq", "show", "dataset.table"], True),
+    (["bq", "query", "INSERT INTO t VALUES (1)"], False),
+    (["bq", "query", "SELECT 1 -- list"], False),
+    (["gcloud", "pubsub", "topics", "publish", "t", "--message=x"], False),
+    (["gcloud", "builds", "submit", "--tag=list"], False),
+    (["gsutil", "cp", "list", "gs://bucket"], False),
+    (["gcloud", "pubsub", "topics", "publish", "t", "--message", "list"], False),
+    (["gcloud", "builds", "submit", "--tag", "get"], False),
+    (["gcloud", "compute", "instances", "create", "info", "--zone", "z"], False),
+    (["gcloud", "compute", "instances", "add-metadata", "show"], False),
+    (["gcloud", "compute", "instances", "describe", "delete-me"], True),
+    (["gcloud", "projects", "list", "--filter", "name:x"], True),
+])
+def test_only_read_only_commands_are_coalesced(cmd_parts, read_only):
+    assert _is_read_only(cmd_parts) is read_only